@@ -0,0 +1,171 @@
+"""
+Compiled array kernels for the Kernel Universe simulation.
+"""
+
+import numpy as np
+from numba import njit
+
+
+def kernel_is_symmetric(kernel: np.ndarray) -> bool:
+    """Check whether a 3x3 kernel has equal corner weights and equal edge weights."""
+    return bool(
+        kernel[0, 0] == kernel[0, 2] == kernel[2, 0] == kernel[2, 2] and
+        kernel[0, 1] == kernel[1, 0] == kernel[1, 2] == kernel[2, 1]
+    )
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def _collect_lower(upper: np.ndarray, lower: np.ndarray) -> float:
+    """Move all lower catalyst into the upper layer and return the upper maximum."""
+    rows, cols = upper.shape
+    peak = upper[0, 0] + lower[0, 0]
+    for i in range(rows):
+        for j in range(cols):
+            value = upper[i, j] + lower[i, j]
+            upper[i, j] = value
+            lower[i, j] = 0.0
+            peak = max(peak, value)
+    return peak
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def _advect_row(arr: np.ndarray, i: int, alpha: float):
+    """Advect row ``i`` of ``arr`` one column to the right in place."""
+    cols = arr.shape[1]
+    # Carry the previous (pre-advection) value along the row
+    prev = arr[i, cols - 1]
+    for j in range(cols):
+        current = arr[i, j]
+        # Same as (1 - alpha) * current + alpha * prev, but the
+        # transfers telescope along the row so mass is kept in float32
+        arr[i, j] = current + alpha * (prev - current)
+        prev = current
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def collect_step(upper: np.ndarray, lower: np.ndarray, out: np.ndarray,
+                 kernel: np.ndarray, alpha: float, epsilon: float) -> bool:
+    """
+    Fused COLLECT pass.
+
+    Moves all lower catalyst into the upper layer, disperses it with the
+    3x3 kernel and advects it one column to the right, writing the result
+    to ``out``. Edges wrap. ``lower`` is left zeroed.
+
+    If no collected cell reaches ``epsilon`` the dispersal is skipped:
+    ``out`` is left untouched and False is returned. Otherwise returns True.
+
+    The layers may be float32, but ``kernel`` should stay float64: the
+    float32 roundings of the default weights sum to slightly more than 1,
+    which would add mass on every pass.
+    """
+    rows, cols = upper.shape
+    k00, k01, k02 = kernel[0, 0], kernel[0, 1], kernel[0, 2]
+    k10, k11, k12 = kernel[1, 0], kernel[1, 1], kernel[1, 2]
+    k20, k21, k22 = kernel[2, 0], kernel[2, 1], kernel[2, 2]
+
+    if _collect_lower(upper, lower) < epsilon:
+        return False
+
+    for i in range(rows):
+        im = (i - 1) % rows
+        ip = (i + 1) % rows
+
+        # Diffuse the row
+        for j in range(cols):
+            jm = (j - 1) % cols
+            jp = (j + 1) % cols
+            out[i, j] = (
+                k00 * upper[im, jm] + k01 * upper[im, j] + k02 * upper[im, jp] +
+                k10 * upper[i, jm] + k11 * upper[i, j] + k12 * upper[i, jp] +
+                k20 * upper[ip, jm] + k21 * upper[ip, j] + k22 * upper[ip, jp]
+            )
+
+        _advect_row(out, i, alpha)
+
+    return True
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def collect_step_symmetric(upper: np.ndarray, lower: np.ndarray, out: np.ndarray,
+                           center: float, edge: float, corner: float, alpha: float,
+                           epsilon: float) -> bool:
+    """
+    collect_step for a kernel with equal edge and equal corner weights
+    (see kernel_is_symmetric): three multiplies per cell instead of nine.
+    """
+    rows, cols = upper.shape
+
+    if _collect_lower(upper, lower) < epsilon:
+        return False
+
+    for i in range(rows):
+        im = (i - 1) % rows
+        ip = (i + 1) % rows
+
+        # Diffuse the row
+        for j in range(cols):
+            jm = (j - 1) % cols
+            jp = (j + 1) % cols
+            out[i, j] = (
+                center * upper[i, j] +
+                edge * (upper[im, j] + upper[ip, j] + upper[i, jm] + upper[i, jp]) +
+                corner * (upper[im, jm] + upper[im, jp] + upper[ip, jm] + upper[ip, jp])
+            )
+
+        _advect_row(out, i, alpha)
+
+    return True
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def emit_step(upper: np.ndarray, lower: np.ndarray, fraction: float):
+    """EMIT pass: move a fraction of the upper catalyst to the lower layer."""
+    rows, cols = upper.shape
+    for i in range(rows):
+        for j in range(cols):
+            transfer = upper[i, j] * fraction
+            lower[i, j] += transfer
+            upper[i, j] -= transfer
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def advect_right(arr: np.ndarray, alpha: float):
+    """Advect ``arr`` one column to the right in place (edges wrap)."""
+    for i in range(arr.shape[0]):
+        _advect_row(arr, i, alpha)
+
+
+@njit(cache=True, boundscheck=False)
+def shift_right(arr: np.ndarray, column: np.ndarray, low: float, high: float,
+                in_range: np.ndarray):
+    """
+    Shift ``arr`` one column to the right in place, inserting ``column`` on
+    the left, and write the mask ``low <= arr <= high`` to ``in_range``.
+    Pass float64 bounds so the comparison is not done at float32 precision.
+    """
+    rows, cols = arr.shape
+    for i in range(rows):
+        for j in range(cols - 1, 0, -1):
+            value = arr[i, j - 1]
+            arr[i, j] = value
+            in_range[i, j] = low <= value <= high
+        value = column[i]
+        arr[i, 0] = value
+        in_range[i, 0] = low <= value <= high
+
+
+def _warmup():
+    """Compile the kernels up front so the first tick does not pay for it."""
+    upper = np.zeros((2, 2), dtype=np.float32)
+    lower = np.zeros((2, 2), dtype=np.float32)
+    out = np.empty((2, 2), dtype=np.float32)
+    collect_step(upper, lower, out, np.zeros((3, 3)), np.float32(0), np.float32(0))
+    collect_step_symmetric(upper, lower, out, 0.0, 0.0, 0.0, np.float32(0), np.float32(0))
+    emit_step(upper, lower, np.float32(0))
+    advect_right(upper, np.float32(0))
+    shift_right(upper, np.zeros(2, dtype=np.float32), 0.0, 0.0,
+                np.empty((2, 2), dtype=np.bool_))
+
+
+_warmup()
@@ -24,6 +24,9 @@ KERNEL_3x3 = np.array([
 # Advection coefficient (rightward flow)
 ADVECT_ALPHA = 0.05
 
+# COLLECT skips dispersal and advection while no catalyst cell reaches this
+COLLECT_EPSILON = 1e-9
+
 # Temperature range for core activation
 T_MIN, T_MAX = 0.40, 0.55
 
@@ -35,6 +38,14 @@ TAU_REFRACT = 12    # Refractory period after bloom
 # Core spawning parameter
 SPAWN_S = 2
 
+# Bloom history: ring buffer capacity, and how many of the most recent
+# blooms get_state() reports
+MAX_BLOOM_LOCATIONS = 10_000
+STATE_BLOOM_LOCATIONS = 100
+
+# Report total catalyst in step() stats (two full-grid sums per tick)
+DEBUG_CONSERVATION = False
+
 # Random seed for reproducibility
 RNG_SEED = 42
 
@@ -44,6 +55,8 @@ INITIAL_CORES = 10
 # Redis configuration
 REDIS_URL = "redis://localhost:6379"
 REDIS_STATE_KEY = "kernel_universe:state"
+REDIS_TICK_KEY = "kernel_universe:state:tick"
+REDIS_STATE_TTL = 10  # seconds; stale snapshots expire if the server stops
 
 # API settings
 API_HOST = "0.0.0.0"
@@ -3,13 +3,14 @@ FastAPI server for Kernel Universe simulation.
 """
 
 import asyncio
-import json
+import logging
 import time
-from typing import Dict, Any, List, Optional
-import redis
+from typing import Dict, Any, List, Optional, Set, Tuple
+import orjson
+import redis.asyncio as aioredis
 
 import numpy as np
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, BackgroundTasks
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, BackgroundTasks, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
@@ -17,8 +18,10 @@ from . import config
 from .simulation import KernelUniverseSimulation
 
 
+logger = logging.getLogger(__name__)
+
 # Initialize Redis connection
-redis_client = redis.Redis.from_url(config.REDIS_URL)
+redis_client = aioredis.from_url(config.REDIS_URL)
 
 # Initialize simulation
 simulation = KernelUniverseSimulation()
@@ -40,7 +43,7 @@ app.add_middleware(
 )
 
 # Active WebSocket connections
-active_connections: List[WebSocket] = []
+active_connections: Set[WebSocket] = set()
 
 # Simulation state
 paused = False
@@ -56,39 +59,94 @@ class SimulationControl(BaseModel):
     parameters: Optional[Dict[str, Any]] = None
 
 
+# Encoding of the latest simulation state as (state version, task resolving
+# to (tick, JSON bytes)); concurrent consumers of a version share the task
+_encoded_state: Tuple[int, Optional[asyncio.Task]] = (-1, None)
+
+
+def encode_snapshot(snapshot: Dict[str, Any]) -> bytes:
+    """Encode a state snapshot to JSON. Safe to run in a worker thread."""
+    return orjson.dumps(KernelUniverseSimulation.encode_state_snapshot(snapshot))
+
+
+async def _encode_snapshot_task(snapshot: Dict[str, Any]) -> Tuple[int, bytes]:
+    """Encode a snapshot in a worker thread, returning its tick and JSON bytes."""
+    state_json = await asyncio.to_thread(encode_snapshot, snapshot)
+    return snapshot["tick"], state_json
+
+
+def _task_failed(task: asyncio.Task) -> bool:
+    """Check whether a finished task was cancelled or raised."""
+    return task.done() and (task.cancelled() or task.exception() is not None)
+
+
+async def encode_state() -> Tuple[int, bytes]:
+    """
+    Encode the current simulation state once per state version for all
+    consumers. Returns the tick and the JSON bytes.
+
+    The snapshot is copied on the event loop, where the simulation is stepped
+    and reset; only the base64/JSON encoding runs in a worker thread.
+    """
+    global _encoded_state
+    version = simulation.state_version
+    cached_version, task = _encoded_state
+    
+    # Start an encode only for a newer version (or to retry a failed one).
+    # The task is cached before any await, so concurrent callers share it
+    # and an older encode can never replace a newer entry.
+    if task is None or version > cached_version or _task_failed(task):
+        snapshot = simulation.get_state_snapshot()
+        task = asyncio.create_task(_encode_snapshot_task(snapshot))
+        _encoded_state = (version, task)
+    
+    # Shield the shared task so one cancelled consumer does not cancel it
+    # for the others
+    return await asyncio.shield(task)
+
+
+async def store_state(state_json: bytes, tick: int):
+    """Write the state and its tick to Redis in a single round trip."""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.set(config.REDIS_STATE_KEY, state_json, ex=config.REDIS_STATE_TTL)
+        pipe.set(config.REDIS_TICK_KEY, tick)
+        await pipe.execute()
+
+
 async def broadcast_state():
     """Broadcast simulation state to all connected clients."""
     if not active_connections:
         return
     
-    state = simulation.get_state()
+    # Grid layers are sent as base64 float32 bytes rather than nested lists
+    tick, state_json = await encode_state()
     
-    # Convert numpy arrays to lists for JSON serialization
-    state_json = json.dumps({
-        "tick": state["tick"],
-        "temperature": state["temperature"],
-        "catalyst_upper": state["catalyst_upper"],
-        "catalyst_lower": state["catalyst_lower"],
-        "cores": state["cores"],
-        "total_blooms": state["total_blooms"],
-        "runtime": state["runtime"]
-    })
+    # Store in Redis and broadcast to all WebSocket connections concurrently
+    connections = list(active_connections)
+    results = await asyncio.gather(
+        store_state(state_json, tick),
+        *(connection.send_bytes(state_json) for connection in connections),
+        return_exceptions=True
+    )
     
-    # Store in Redis
-    redis_client.set(config.REDIS_STATE_KEY, state_json)
+    # Report a failed Redis write; /snapshot serves stale state until the TTL
+    if isinstance(results[0], Exception):
+        logger.error("Failed to store simulation state in Redis: %r", results[0])
     
-    # Broadcast to all WebSocket connections
-    for connection in active_connections:
-        await connection.send_text(state_json)
+    # Drop connections whose send failed
+    for connection, result in zip(connections, results[1:]):
+        if isinstance(result, Exception):
+            active_connections.discard(connection)
 
 
 async def simulation_loop():
     """Main simulation loop that runs in the background."""
-    last_step_time = time.time()
-    last_stream_time = time.time()
+    # Monotonic clock so wall-clock adjustments do not stall or burst the loop
+    last_step_time = time.monotonic()
+    last_stream_time = time.monotonic()
     
     while True:
-        current_time = time.time()
+        current_time = time.monotonic()
         
         # Step simulation if not paused
         if not paused and (current_time - last_step_time) >= step_interval:
@@ -97,11 +155,18 @@ async def simulation_loop():
         
         # Stream updates at the configured FPS
         if (current_time - last_stream_time) >= stream_interval:
-            await broadcast_state()
+            # A failed broadcast must not end the loop and stop the simulation
+            try:
+                await broadcast_state()
+            except Exception:
+                logger.exception("Failed to broadcast simulation state")
             last_stream_time = current_time
         
-        # Yield to allow other tasks to run
-        await asyncio.sleep(0.01)
+        # Sleep until the next step or stream is due
+        next_wake = last_stream_time + stream_interval
+        if not paused:
+            next_wake = min(next_wake, last_step_time + step_interval)
+        await asyncio.sleep(max(0, next_wake - time.monotonic()))
 
 
 @app.on_event("startup")
@@ -113,13 +178,14 @@ async def startup_event():
 @app.get("/snapshot")
 async def get_snapshot():
     """Get the current simulation state."""
-    # Try to get from Redis first
-    cached_state = redis_client.get(config.REDIS_STATE_KEY)
+    # Try to get from Redis first; both paths return already-encoded JSON
+    cached_state = await redis_client.get(config.REDIS_STATE_KEY)
     if cached_state:
-        return json.loads(cached_state)
+        return Response(content=cached_state, media_type="application/json")
     
     # Otherwise get directly from simulation
-    return simulation.get_state()
+    _, state_json = await encode_state()
+    return Response(content=state_json, media_type="application/json")
 
 
 @app.post("/control")
@@ -168,28 +234,33 @@ async def control_simulation(control: SimulationControl):
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for streaming simulation updates."""
     await websocket.accept()
-    active_connections.append(websocket)
+    active_connections.add(websocket)
     
     try:
         # Send initial state
-        state = simulation.get_state()
-        await websocket.send_json(state)
+        _, state_json = await encode_state()
+        await websocket.send_bytes(state_json)
         
         # Keep connection open and handle commands
         while True:
             data = await websocket.receive_text()
             try:
-                command = json.loads(data)
+                command = orjson.loads(data)
                 if "control" in command:
                     control = SimulationControl(**command["control"])
                     await control_simulation(control)
-            except json.JSONDecodeError:
-                await websocket.send_json({"error": "Invalid JSON"})
+            except orjson.JSONDecodeError:
+                await websocket.send_bytes(orjson.dumps({"error": "Invalid JSON"}))
             except Exception as e:
-                await websocket.send_json({"error": str(e)})
+                await websocket.send_bytes(orjson.dumps({"error": str(e)}))
     
     except WebSocketDisconnect:
-        active_connections.remove(websocket)
+        pass
+    
+    finally:
+        # Also drop the socket when a send fails with anything other than a
+        # clean disconnect, so it is not left in active_connections
+        active_connections.discard(websocket)
 
 
 if __name__ == "__main__":
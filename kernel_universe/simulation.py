@@ -2,14 +2,47 @@
 Core simulation engine for Kernel Universe.
 """
 
+import base64
 import numpy as np
+from scipy.ndimage import correlate
 from typing import List, Tuple, Dict, Any
 import time
 from . import config
+from ._kernels import (
+    advect_right,
+    collect_step,
+    collect_step_symmetric,
+    emit_step,
+    kernel_is_symmetric,
+    shift_right,
+)
+
+
+# Per-core state, stored on the simulation as Structure-of-Arrays:
+# (attribute name, dtype, initial value)
+_CORE_FIELDS = (
+    ("cx", np.int32, 0),
+    ("cy", np.int32, 0),
+    ("temp_exposure_count", np.int32, 0),
+    ("bloomed", np.bool_, False),
+    ("refractory_countdown", np.int32, 0),
+    ("total_blooms_per_core", np.int32, 0),
+    ("last_bloom_tick", np.int64, -1),
+)
+
+
+# Grid layers carried as bytes in state snapshots and base64 in binary state
+_STATE_LAYERS = ("temperature", "catalyst_upper", "catalyst_lower")
 
 
 class Core:
-    """Represents a core in the simulation that can bloom under specific conditions."""
+    """
+    Represents a core in the simulation that can bloom under specific conditions.
+
+    The simulation keeps core state in arrays and updates all cores at once;
+    this class is the per-core view used for serialization, and its
+    ``update`` is the scalar reference for the vectorized rules.
+    """
     
     def __init__(self, x: int, y: int):
         self.x = x
@@ -41,7 +74,7 @@ class Core:
         if (
             emit_mode and
             catalyst >= config.C_THRESH and
-            config.T_MIN <= temperature <= config.T_MAX
+            config.T_MIN <= float(temperature) <= config.T_MAX
         ):
             self.temp_exposure_count += 1
         else:
@@ -84,7 +117,10 @@ class KernelUniverseSimulation:
         """Initialize the simulation with default parameters."""
         # Set random seed for reproducibility
         self.seed = seed if seed is not None else config.RNG_SEED
-        self.rng = np.random.RandomState(self.seed)
+        self.rng = np.random.default_rng(self.seed)
+        
+        # Incremented whenever the state changes (every step and reset)
+        self.state_version = 0
         
         # Initialize simulation state
         self.reset()
@@ -95,70 +131,123 @@ class KernelUniverseSimulation:
         self.tick = 0
         
         # Create temperature layer (lower)
-        self.temperature = self.rng.random((config.GRID_SIZE, config.GRID_SIZE))
+        # Layers are float32: the step is memory-bound on these grids
+        self.temperature = self.rng.random((config.GRID_SIZE, config.GRID_SIZE), dtype=np.float32)
         
         # Create catalyst layer (upper)
-        self.catalyst_upper = np.zeros((config.GRID_SIZE, config.GRID_SIZE))
-        self.catalyst_lower = np.zeros((config.GRID_SIZE, config.GRID_SIZE))
+        self.catalyst_upper = np.zeros((config.GRID_SIZE, config.GRID_SIZE), dtype=np.float32)
+        self.catalyst_lower = np.zeros((config.GRID_SIZE, config.GRID_SIZE), dtype=np.float32)
         
         # Add initial catalyst to upper layer
         total_catalyst = config.GRID_SIZE * config.GRID_SIZE * 0.1  # 10% filled
-        self.catalyst_upper = self.rng.random((config.GRID_SIZE, config.GRID_SIZE)) * 0.2
+        self.catalyst_upper = self.rng.random((config.GRID_SIZE, config.GRID_SIZE), dtype=np.float32) * np.float32(0.2)
+        
+        # Scratch buffers: the COLLECT pass output (swapped with the upper
+        # layer) and the new temperature column
+        self._tmp = np.empty_like(self.catalyst_upper)
+        self._col_buf = np.empty(config.GRID_SIZE, dtype=np.float32)
         
-        # Initialize cores
-        self.cores = []
+        # Cells with temperature in [T_MIN, T_MAX], refreshed by shift_temperature.
+        # Compared in float64 like Core.update; numpy would otherwise round
+        # the bounds to float32
+        temperature = self.temperature.astype(np.float64)
+        self._temp_in_range = (temperature >= config.T_MIN) & (temperature <= config.T_MAX)
+        
+        # Initialize cores (one array per field, grown by _add_cores)
+        self.num_cores = 0
+        self._core_buffers = {
+            name: np.full(config.INITIAL_CORES, fill, dtype=dtype)
+            for name, dtype, fill in _CORE_FIELDS
+        }
+        for name, _, _ in _CORE_FIELDS:
+            setattr(self, name, self._core_buffers[name][:0])
         self.initialize_cores(config.INITIAL_CORES)
         
         # Statistics
         self.total_blooms = 0
-        self.bloom_locations = []
+        # Ring buffer of (x, y, tick) rows; _bloom_head counts all blooms recorded
+        self.bloom_locations = np.zeros((config.MAX_BLOOM_LOCATIONS, 3), dtype=np.int32)
+        self._bloom_head = 0
         self.start_time = time.time()
+        
+        # Serialized state cache for get_state
+        self._state_cache = None
+        self._state_cache_version = -1
+        self._mark_state_changed()
     
     def initialize_cores(self, num_cores: int):
         """Initialize cores at random positions."""
-        positions = set()
-        for _ in range(num_cores):
-            while True:
-                x = self.rng.randint(0, config.GRID_SIZE)
-                y = self.rng.randint(0, config.GRID_SIZE)
-                if (x, y) not in positions:
-                    positions.add((x, y))
-                    self.cores.append(Core(x, y))
-                    break
+        # Sample distinct grid cells in one batch
+        cells = self.rng.choice(config.GRID_SIZE * config.GRID_SIZE, size=num_cores, replace=False)
+        self._add_cores(cells % config.GRID_SIZE, cells // config.GRID_SIZE)
+    
+    def _add_cores(self, xs: np.ndarray, ys: np.ndarray):
+        """Append fresh cores at the given positions to the core arrays."""
+        start = self.num_cores
+        stop = start + len(xs)
+        
+        # Grow the backing buffers geometrically so appends stay amortized O(1)
+        capacity = len(self._core_buffers["cx"])
+        if stop > capacity:
+            capacity = max(stop, 2 * capacity)
+            for name, _, _ in _CORE_FIELDS:
+                self._core_buffers[name] = np.resize(self._core_buffers[name], capacity)
+        
+        # Initialize the new slots and re-slice the public views
+        for name, _, fill in _CORE_FIELDS:
+            buffer = self._core_buffers[name]
+            buffer[start:stop] = fill
+            setattr(self, name, buffer[:stop])
+        self.cx[start:stop] = xs
+        self.cy[start:stop] = ys
+        self.num_cores = stop
+        self._mark_state_changed()
+    
+    @property
+    def cores(self) -> List[Core]:
+        """Per-core views of the core arrays."""
+        cores = []
+        for i in range(self.num_cores):
+            core = Core(int(self.cx[i]), int(self.cy[i]))
+            core.temp_exposure_count = int(self.temp_exposure_count[i])
+            core.bloomed = bool(self.bloomed[i])
+            core.refractory_countdown = int(self.refractory_countdown[i])
+            core.total_blooms = int(self.total_blooms_per_core[i])
+            core.last_bloom_tick = int(self.last_bloom_tick[i])
+            cores.append(core)
+        return cores
     
     def shift_temperature(self):
         """Shift temperature map to the right by one column."""
-        # Shift right
-        self.temperature = np.roll(self.temperature, 1, axis=1)
-        
         # Generate new leftmost column
-        self.temperature[:, 0] = self.rng.random(config.GRID_SIZE)
+        self.rng.random(dtype=np.float32, out=self._col_buf)
+        
+        # Shift right in place, refreshing the temperature range mask
+        shift_right(
+            self.temperature,
+            self._col_buf,
+            float(config.T_MIN),
+            float(config.T_MAX),
+            self._temp_in_range
+        )
+        self._mark_state_changed()
     
     def apply_convolution(self, input_array: np.ndarray, kernel: np.ndarray) -> np.ndarray:
-        """Apply convolution with a given kernel."""
-        output = np.zeros_like(input_array)
-        pad_width = kernel.shape[0] // 2
-        
-        # Pad the input array
-        padded = np.pad(input_array, pad_width, mode='wrap')
-        
-        # Apply convolution
-        for i in range(config.GRID_SIZE):
-            for j in range(config.GRID_SIZE):
-                window = padded[i:i+kernel.shape[0], j:j+kernel.shape[1]]
-                output[i, j] = np.sum(window * kernel)
-        
-        return output
+        """Apply convolution with a given kernel (wrapping at the edges)."""
+        # correlate (not convolve) keeps the original window * kernel
+        # orientation for non-symmetric kernels
+        return correlate(input_array, kernel, mode='wrap')
     
     def advect_right(self, array: np.ndarray, alpha: float) -> np.ndarray:
-        """Apply rightward advection to the array."""
-        shifted = np.roll(array, 1, axis=1)
-        return (1 - alpha) * array + alpha * shifted
+        """Apply rightward advection to the array in place and return it."""
+        advect_right(array, alpha)
+        return array
     
     def step(self):
         """Execute one simulation step (tick)."""
         # Increment tick counter
         self.tick += 1
+        self._mark_state_changed()
         
         # Determine mode: EMIT (even ticks) or COLLECT (odd ticks)
         emit_mode = (self.tick % 2 == 0)
@@ -169,48 +258,90 @@ class KernelUniverseSimulation:
         # Execute catalyst mode logic
         if emit_mode:
             # EMIT mode: Move fraction of upper catalyst to lower
-            transfer = self.catalyst_upper * config.EMIT_FRACTION
-            self.catalyst_lower += transfer
-            self.catalyst_upper -= transfer
+            emit_step(self.catalyst_upper, self.catalyst_lower, np.float32(config.EMIT_FRACTION))
         else:
-            # COLLECT mode: Move all lower catalyst up, disperse with kernel, advect
-            self.catalyst_upper += self.catalyst_lower
-            self.catalyst_lower.fill(0)
-            
-            # Apply diffusion (3x3 kernel)
-            self.catalyst_upper = self.apply_convolution(self.catalyst_upper, config.KERNEL_3x3)
-            
-            # Apply advection
-            self.catalyst_upper = self.advect_right(self.catalyst_upper, config.ADVECT_ALPHA)
+            # COLLECT mode: Move all lower catalyst up, disperse with kernel, advect.
+            # Dispersal is skipped while the collected field is effectively empty.
+            kernel = np.asarray(config.KERNEL_3x3, dtype=np.float64)
+            alpha = np.float32(config.ADVECT_ALPHA)
+            epsilon = np.float32(config.COLLECT_EPSILON)
+            if kernel_is_symmetric(kernel):
+                dispersed = collect_step_symmetric(
+                    self.catalyst_upper,
+                    self.catalyst_lower,
+                    self._tmp,
+                    kernel[1, 1],
+                    kernel[0, 1],
+                    kernel[0, 0],
+                    alpha,
+                    epsilon
+                )
+            else:
+                dispersed = collect_step(
+                    self.catalyst_upper,
+                    self.catalyst_lower,
+                    self._tmp,
+                    kernel,
+                    alpha,
+                    epsilon
+                )
+            if dispersed:
+                self.catalyst_upper, self._tmp = self._tmp, self.catalyst_upper
+        
+        # Update cores (vectorized form of Core.update)
+        in_range_at_cores = self._temp_in_range[self.cy, self.cx]
+        catalyst_at_cores = self.catalyst_upper[self.cy, self.cx]
         
-        # Bloom counter for this tick
-        blooms_this_tick = 0
+        # Cores in their refractory period only count down
+        refractory = self.refractory_countdown > 0
+        self.refractory_countdown[refractory] -= 1
+        active = ~refractory
+        self.bloomed[active] = False
+        
+        # Count consecutive EMIT ticks with enough catalyst and temperature
+        # in range; reset the counter when any requirement is missing
+        exposed = (
+            active &
+            emit_mode &
+            (catalyst_at_cores >= config.C_THRESH) &
+            in_range_at_cores
+        )
+        self.temp_exposure_count[exposed] += 1
+        self.temp_exposure_count[active & ~exposed] = 0
+        
+        # Check bloom conditions
+        # (temperature only matters through the exposure count, so with
+        # TAU_TEMP <= 0 a core can bloom outside the temperature range)
+        bloomed = (
+            active &
+            emit_mode &
+            (catalyst_at_cores >= config.C_THRESH) &
+            (self.temp_exposure_count >= config.TAU_TEMP)
+        )
+        self.bloomed[bloomed] = True
+        self.total_blooms_per_core[bloomed] += 1
+        self.last_bloom_tick[bloomed] = self.tick
+        self.refractory_countdown[bloomed] = config.TAU_REFRACT
+        self.temp_exposure_count[bloomed] = 0
         
-        # Update cores
-        for core in self.cores:
-            x, y = core.x, core.y
-            temperature_at_core = self.temperature[y, x]
-            catalyst_at_core = self.catalyst_upper[y, x]
+        bloom_x = self.cx[bloomed]
+        bloom_y = self.cy[bloomed]
+        blooms_this_tick = len(bloom_x)
+        if blooms_this_tick:
+            self.total_blooms += blooms_this_tick
+            self._record_blooms(bloom_x, bloom_y)
             
-            # Update core state
-            did_bloom = core.update(
-                self.tick, 
-                temperature_at_core, 
-                catalyst_at_core, 
-                emit_mode
+            # Spawn new cores if configured
+            if config.SPAWN_S > 0:
+                self.spawn_new_cores(bloom_x, bloom_y, config.SPAWN_S)
+        
+        # Check conservation of catalyst (debugging only)
+        total_catalyst = None
+        if config.DEBUG_CONSERVATION:
+            total_catalyst = float(
+                np.sum(self.catalyst_upper, dtype=np.float64) +
+                np.sum(self.catalyst_lower, dtype=np.float64)
             )
-            
-            if did_bloom:
-                blooms_this_tick += 1
-                self.total_blooms += 1
-                self.bloom_locations.append((x, y, self.tick))
-                
-                # Spawn new cores if configured
-                if config.SPAWN_S > 0:
-                    self.spawn_new_cores(x, y, config.SPAWN_S)
-        
-        # Check conservation of catalyst (debugging)
-        total_catalyst = np.sum(self.catalyst_upper) + np.sum(self.catalyst_lower)
         
         # Return stats for this tick
         return {
@@ -221,31 +352,92 @@ class KernelUniverseSimulation:
             "total_catalyst": total_catalyst
         }
     
-    def spawn_new_cores(self, parent_x: int, parent_y: int, count: int):
-        """Spawn new cores near the parent core."""
-        for _ in range(count):
-            # Generate random position within 5 cells of parent
-            dx = self.rng.randint(-5, 6)
-            dy = self.rng.randint(-5, 6)
-            
-            new_x = (parent_x + dx) % config.GRID_SIZE
-            new_y = (parent_y + dy) % config.GRID_SIZE
-            
-            # Add the new core
-            self.cores.append(Core(new_x, new_y))
+    def spawn_new_cores(self, parent_x, parent_y, count: int):
+        """Spawn ``count`` new cores near each parent core."""
+        parent_x = np.repeat(np.atleast_1d(parent_x), count)
+        parent_y = np.repeat(np.atleast_1d(parent_y), count)
+        
+        # Generate random positions within 5 cells of the parents
+        dx, dy = self.rng.integers(-5, 6, size=(2, len(parent_x)))
+        
+        new_x = (parent_x + dx) % config.GRID_SIZE
+        new_y = (parent_y + dy) % config.GRID_SIZE
+        
+        # Add the new cores
+        self._add_cores(new_x, new_y)
+    
+    def _record_blooms(self, xs: np.ndarray, ys: np.ndarray):
+        """Append this tick's bloom locations to the ring buffer."""
+        slots = (self._bloom_head + np.arange(len(xs))) % len(self.bloom_locations)
+        self.bloom_locations[slots, 0] = xs
+        self.bloom_locations[slots, 1] = ys
+        self.bloom_locations[slots, 2] = self.tick
+        self._bloom_head += len(xs)
+    
+    def recent_bloom_locations(self, count: int) -> np.ndarray:
+        """Get up to ``count`` of the most recent (x, y, tick) bloom rows, oldest first."""
+        capacity = len(self.bloom_locations)
+        count = min(count, self._bloom_head, capacity)
+        slots = (self._bloom_head - count + np.arange(count)) % capacity
+        return self.bloom_locations[slots]
+    
+    def _mark_state_changed(self):
+        """
+        Bump state_version, invalidating get_state and the server's encoded
+        state. Every method that mutates the simulation state must call this.
+        """
+        self.state_version += 1
     
     def get_state(self) -> Dict[str, Any]:
-        """Get the current state of the simulation."""
-        return {
+        """
+        Get the current state of the simulation. The result is cached until
+        state_version changes, so concurrent consumers share one serialization.
+        """
+        if self._state_cache_version == self.state_version:
+            return self._state_cache
+        
+        self._state_cache = {
             "tick": self.tick,
             "temperature": self.temperature.tolist(),
             "catalyst_upper": self.catalyst_upper.tolist(),
             "catalyst_lower": self.catalyst_lower.tolist(),
             "cores": [core.to_dict() for core in self.cores],
             "total_blooms": self.total_blooms,
-            "bloom_locations": self.bloom_locations,
+            "bloom_locations": self.recent_bloom_locations(config.STATE_BLOOM_LOCATIONS).tolist(),
             "runtime": time.time() - self.start_time
         }
+        self._state_cache_version = self.state_version
+        return self._state_cache
+    
+    def get_state_snapshot(self) -> Dict[str, Any]:
+        """
+        Copy the current state, with the grid layers as raw float32 bytes.
+        The snapshot shares nothing with the simulation, so it can be encoded
+        with encode_state_snapshot in another thread while the simulation
+        steps or resets.
+        """
+        snapshot = {
+            "tick": self.tick,
+            "shape": list(self.temperature.shape),
+            "dtype": "float32",
+        }
+        for layer in _STATE_LAYERS:
+            snapshot[layer] = getattr(self, layer).tobytes()
+        snapshot.update({
+            "cores": [core.to_dict() for core in self.cores],
+            "total_blooms": self.total_blooms,
+            "bloom_locations": self.recent_bloom_locations(config.STATE_BLOOM_LOCATIONS).tolist(),
+            "runtime": time.time() - self.start_time
+        })
+        return snapshot
+    
+    @staticmethod
+    def encode_state_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Base64-encode the grid layers of a snapshot into the binary state format."""
+        state = dict(snapshot)
+        for layer in _STATE_LAYERS:
+            state[layer] = base64.b64encode(snapshot[layer]).decode("ascii")
+        return state
     
     def set_parameter(self, param_name: str, value: Any) -> bool:
         """Update a configuration parameter."""
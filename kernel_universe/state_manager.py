@@ -17,6 +17,7 @@ class StateManager:
         self.redis_url = redis_url or config.REDIS_URL
         self.redis_client = redis.Redis.from_url(self.redis_url)
         self.state_key = config.REDIS_STATE_KEY
+        self.tick_key = config.REDIS_TICK_KEY
     
     def save_state(self, state: Dict[str, Any]) -> bool:
         """Save the simulation state to Redis."""
@@ -24,8 +25,12 @@ class StateManager:
             # Convert to JSON string
             state_json = json.dumps(state)
             
-            # Store in Redis
-            self.redis_client.set(self.state_key, state_json)
+            # Store state and tick in Redis in a single round trip
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.set(self.state_key, state_json)
+            if "tick" in state:
+                pipe.set(self.tick_key, state["tick"])
+            pipe.execute()
             return True
         except Exception as e:
             print(f"Error saving state: {e}")
@@ -48,7 +53,7 @@ class StateManager:
     def clear_state(self) -> bool:
         """Clear the stored state."""
         try:
-            self.redis_client.delete(self.state_key)
+            self.redis_client.delete(self.state_key, self.tick_key)
             return True
         except Exception as e:
             print(f"Error clearing state: {e}")
@@ -2,6 +2,8 @@
 Tests for the Kernel Universe simulation.
 """
 
+import base64
+
 import numpy as np
 import pytest
 
@@ -37,26 +39,62 @@ def test_temperature_shift():
     # Note: The first column is randomized, so we can't check it directly
     np.testing.assert_array_equal(sim.temperature[:, 1], original_first_column)
     np.testing.assert_array_equal(sim.temperature[:, 2], original_second_column)
+    
+    # The temperature range mask follows the shifted map (compared in float64)
+    temperature = sim.temperature.astype(np.float64)
+    np.testing.assert_array_equal(
+        sim._temp_in_range,
+        (temperature >= config.T_MIN) & (temperature <= config.T_MAX)
+    )
+
+
+def test_temperature_range_mask_uses_exact_bounds():
+    """Test that the mask and Core.update agree at the float32-rounded bounds."""
+    sim = KernelUniverseSimulation(seed=42)
+    
+    # float32(T_MAX) is slightly above T_MAX; float32(T_MIN) is above T_MIN
+    edge_values = np.array([np.float32(config.T_MAX), np.float32(config.T_MIN)], dtype=np.float32)
+    sim.temperature[:2, -2] = edge_values
+    sim.shift_temperature()
+    
+    for row, value in enumerate(edge_values):
+        core = Core(0, 0)
+        core.update(tick=2, temperature=value, catalyst=config.C_THRESH, emit_mode=True)
+        assert sim._temp_in_range[row, -1] == (core.temp_exposure_count == 1)
+    assert not sim._temp_in_range[0, -1]
+    assert sim._temp_in_range[1, -1]
 
 
 def test_catalyst_conservation():
     """Test that catalyst is conserved during simulation steps."""
     sim = KernelUniverseSimulation(seed=42)
     
-    # Get initial total catalyst
-    initial_total = np.sum(sim.catalyst_upper) + np.sum(sim.catalyst_lower)
+    # Get initial total catalyst (accumulate in float64; the float32
+    # layers would otherwise round the sum itself)
+    initial_total = np.sum(sim.catalyst_upper, dtype=np.float64) + np.sum(sim.catalyst_lower, dtype=np.float64)
     
     # Run several steps
     for _ in range(10):
         sim.step()
         
         # Check total catalyst after step
-        current_total = np.sum(sim.catalyst_upper) + np.sum(sim.catalyst_lower)
+        current_total = np.sum(sim.catalyst_upper, dtype=np.float64) + np.sum(sim.catalyst_lower, dtype=np.float64)
         
         # Should be approximately equal (allowing for floating-point errors)
         np.testing.assert_almost_equal(current_total, initial_total, decimal=5)
 
 
+def test_step_reports_total_catalyst_in_debug_mode(monkeypatch):
+    """Test that step() only reports total catalyst when DEBUG_CONSERVATION is set."""
+    sim = KernelUniverseSimulation(seed=42)
+    assert sim.step()["total_catalyst"] is None
+    
+    monkeypatch.setattr(config, "DEBUG_CONSERVATION", True)
+    expected = np.sum(sim.catalyst_upper, dtype=np.float64) + np.sum(sim.catalyst_lower, dtype=np.float64)
+    stats = sim.step()
+    np.testing.assert_almost_equal(stats["total_catalyst"], expected, decimal=5)
+
+
 def test_core_bloom_conditions():
     """Test that cores bloom under the right conditions."""
     # Create a core
@@ -92,4 +130,214 @@ def test_core_bloom_conditions():
         temperature=config.T_MIN + 0.01, 
         catalyst=config.C_THRESH + 0.1, 
         emit_mode=True
-    )
\ No newline at end of file
+    )
+
+
+def test_convolution_wraps_edges():
+    """Test that diffusion wraps around the grid edges and conserves mass."""
+    sim = KernelUniverseSimulation(seed=42)
+    
+    # Asymmetric kernel (weights sum to 1) so orientation is observable
+    kernel = np.arange(9, dtype=np.float64).reshape(3, 3) / 36
+    
+    # Place a unit impulse in the top-left corner
+    impulse = np.zeros((config.GRID_SIZE, config.GRID_SIZE))
+    impulse[0, 0] = 1.0
+    
+    result = sim.apply_convolution(impulse, kernel)
+    
+    # Neighbors across the edges receive the kernel weights in window * kernel
+    # (correlation) orientation: output[i, j] sees input[i + a - 1, j + b - 1]
+    # with weight kernel[a, b]
+    assert result[0, 0] == pytest.approx(kernel[1, 1])
+    assert result[-1, 0] == pytest.approx(kernel[2, 1])
+    assert result[0, -1] == pytest.approx(kernel[1, 2])
+    assert result[-1, -1] == pytest.approx(kernel[2, 2])
+    assert result[1, 1] == pytest.approx(kernel[0, 0])
+    
+    # Total mass is preserved
+    assert np.sum(result) == pytest.approx(1.0)
+
+
+def test_collect_step_matches_reference():
+    """Test that the fused COLLECT pass matches diffusion followed by advection."""
+    sim = KernelUniverseSimulation(seed=42)
+    sim.catalyst_lower = sim.rng.random((config.GRID_SIZE, config.GRID_SIZE), dtype=np.float32) * np.float32(0.1)
+    
+    # Reference: collect, diffuse, then advect with np.roll
+    collected = sim.catalyst_upper + sim.catalyst_lower
+    diffused = sim.apply_convolution(collected, config.KERNEL_3x3)
+    alpha = config.ADVECT_ALPHA
+    expected = (1 - alpha) * diffused + alpha * np.roll(diffused, 1, axis=1)
+    
+    # Tick 1 is a COLLECT tick
+    sim.step()
+    
+    np.testing.assert_allclose(sim.catalyst_upper, expected, atol=1e-6)
+    assert not sim.catalyst_lower.any()
+
+
+@pytest.mark.parametrize("t_min, t_max, c_thresh, tau_temp, seed", [
+    # Wide temperature window, blooms after one exposure
+    (0.2, 1.0, 0.01, 1, 42),
+    # Narrow window with TAU_TEMP=0: cores also bloom out of range
+    (0.9, 1.0, 0.0, 0, 1),
+])
+def test_vectorized_cores_match_reference(monkeypatch, t_min, t_max, c_thresh, tau_temp, seed):
+    """Test that the vectorized core update matches Core.update."""
+    # Make blooms frequent and keep the population fixed
+    monkeypatch.setattr(config, "T_MIN", t_min)
+    monkeypatch.setattr(config, "T_MAX", t_max)
+    monkeypatch.setattr(config, "C_THRESH", c_thresh)
+    monkeypatch.setattr(config, "TAU_TEMP", tau_temp)
+    monkeypatch.setattr(config, "SPAWN_S", 0)
+    
+    sim = KernelUniverseSimulation(seed=seed)
+    reference = sim.cores
+    
+    for _ in range(100):
+        sim.step()
+        for core in reference:
+            core.update(
+                sim.tick,
+                sim.temperature[core.y, core.x],
+                sim.catalyst_upper[core.y, core.x],
+                sim.tick % 2 == 0
+            )
+        
+        assert [core.to_dict() for core in sim.cores] == [core.to_dict() for core in reference]
+    
+    assert sim.total_blooms == sum(core.total_blooms for core in reference) > 0
+
+
+def test_bloom_spawns_cores(monkeypatch):
+    """Test that blooming cores spawn SPAWN_S children each."""
+    monkeypatch.setattr(config, "T_MIN", 0.0)
+    monkeypatch.setattr(config, "T_MAX", 1.0)
+    monkeypatch.setattr(config, "C_THRESH", 0.0)
+    monkeypatch.setattr(config, "TAU_TEMP", 1)
+    
+    sim = KernelUniverseSimulation(seed=42)
+    for _ in range(4):
+        sim.step()
+    
+    assert sim.total_blooms > 0
+    assert sim.num_cores == config.INITIAL_CORES + sim.total_blooms * config.SPAWN_S
+    assert len(sim.cores) == sim.num_cores
+
+
+def test_binary_state_round_trip():
+    """Test that an encoded state snapshot decodes to the grid layers."""
+    sim = KernelUniverseSimulation(seed=42)
+    sim.step()
+    
+    state = KernelUniverseSimulation.encode_state_snapshot(sim.get_state_snapshot())
+    assert state["tick"] == sim.tick
+    assert state["shape"] == [config.GRID_SIZE, config.GRID_SIZE]
+    for layer in ("temperature", "catalyst_upper", "catalyst_lower"):
+        decoded = np.frombuffer(base64.b64decode(state[layer]), dtype=state["dtype"])
+        np.testing.assert_array_equal(decoded.reshape(state["shape"]), getattr(sim, layer))
+    assert state["bloom_locations"] == sim.get_state()["bloom_locations"]
+
+
+def test_state_snapshot_is_detached():
+    """Test that a state snapshot is unaffected by later steps and resets."""
+    sim = KernelUniverseSimulation(seed=42)
+    sim.step()
+    
+    snapshot = sim.get_state_snapshot()
+    expected = KernelUniverseSimulation.encode_state_snapshot(sim.get_state_snapshot())
+    sim.step()
+    sim.reset()
+    
+    state = KernelUniverseSimulation.encode_state_snapshot(snapshot)
+    for key in ("tick", "temperature", "catalyst_upper", "catalyst_lower", "cores"):
+        assert state[key] == expected[key]
+
+
+def test_bloom_locations_ring_buffer(monkeypatch):
+    """Test that bloom history is bounded and keeps the most recent blooms."""
+    monkeypatch.setattr(config, "MAX_BLOOM_LOCATIONS", 4)
+    sim = KernelUniverseSimulation(seed=42)
+    
+    for tick in range(1, 4):
+        sim.tick = tick
+        sim._record_blooms(np.array([tick, tick]), np.array([0, 1]))
+    
+    # Six blooms recorded, only the last four kept
+    assert sim.bloom_locations.shape == (4, 3)
+    np.testing.assert_array_equal(
+        sim.recent_bloom_locations(10),
+        [[2, 0, 2], [2, 1, 2], [3, 0, 3], [3, 1, 3]]
+    )
+    np.testing.assert_array_equal(sim.recent_bloom_locations(1), [[3, 1, 3]])
+
+
+def test_initial_cores_are_distinct():
+    """Test that initial cores occupy distinct grid cells."""
+    sim = KernelUniverseSimulation(seed=42)
+    sim.initialize_cores(500)
+    
+    positions = set(zip(sim.cx[config.INITIAL_CORES:].tolist(), sim.cy[config.INITIAL_CORES:].tolist()))
+    assert len(positions) == 500
+    assert sim.cx.min() >= 0 and sim.cx.max() < config.GRID_SIZE
+    assert sim.cy.min() >= 0 and sim.cy.max() < config.GRID_SIZE
+
+
+def test_get_state_cached_per_tick():
+    """Test that get_state is cached until the simulation changes."""
+    sim = KernelUniverseSimulation(seed=42)
+    sim.step()
+    
+    state = sim.get_state()
+    assert sim.get_state() is state
+    
+    sim.step()
+    assert sim.get_state() is not state
+    assert sim.get_state()["tick"] == sim.tick
+    
+    # Reset invalidates the cache even though the tick restarts
+    state = sim.get_state()
+    sim.reset()
+    assert sim.get_state() is not state
+    assert sim.get_state()["tick"] == 0
+    
+    # Mutators called outside step() invalidate it too
+    for mutate in (sim.shift_temperature, lambda: sim.initialize_cores(1)):
+        state = sim.get_state()
+        version = sim.state_version
+        mutate()
+        assert sim.state_version > version
+        assert sim.get_state() is not state
+    assert len(sim.get_state()["cores"]) == config.INITIAL_CORES + 1
+
+
+def test_collect_step_non_symmetric_kernel(monkeypatch):
+    """Test that non-symmetric kernels fall back to the generic COLLECT pass."""
+    kernel = np.array([
+        [0.00, 0.10, 0.20],
+        [0.05, 0.30, 0.15],
+        [0.00, 0.10, 0.10]
+    ])
+    monkeypatch.setattr(config, "KERNEL_3x3", kernel)
+    sim = KernelUniverseSimulation(seed=42)
+    
+    diffused = sim.apply_convolution(sim.catalyst_upper, kernel)
+    alpha = config.ADVECT_ALPHA
+    expected = (1 - alpha) * diffused + alpha * np.roll(diffused, 1, axis=1)
+    sim.step()
+    
+    np.testing.assert_allclose(sim.catalyst_upper, expected, atol=1e-6)
+
+
+def test_collect_skips_empty_field():
+    """Test that COLLECT leaves a near-empty catalyst field undispersed."""
+    sim = KernelUniverseSimulation(seed=42)
+    sim.catalyst_upper[:] = 0
+    sim.catalyst_upper[0, 0] = config.COLLECT_EPSILON / 10
+    expected = sim.catalyst_upper.copy()
+    
+    # Tick 1 is a COLLECT tick
+    sim.step()
+    
+    np.testing.assert_array_equal(sim.catalyst_upper, expected)